@@ -3,26 +3,123 @@ YouTube/Playlist to MP3 Converter
 Flask web application
 """
 import os
+import re
+import time
+import uuid
 import shutil
 import zipfile
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file, send_from_directory
+import orjson
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+from utils.downloader import extract_playlist_info, download_as_mp3, download_media, ensure_ffmpeg
+from utils.similarity import find_duplicates, title_key
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider using orjson for faster request parsing and jsonify"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
-from utils.downloader import extract_playlist_info, download_as_mp3, download_media, format_duration, ensure_ffmpeg
-from utils.similarity import find_duplicates
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.config['SECRET_KEY'] = 'yt-to-mp3-secret-key'
 
 DOWNLOADS_DIR = Path(__file__).parent / "downloads"
 
-# Store selected folder path from dialog
-selected_folder_path = None
+# Long-lived hidden Tk root that hosts folder dialogs (started on first use)
+_tk_root = None
+_tk_ready = threading.Event()
+_tk_lock = threading.Lock()
+
+# Folder dialog currently open: {'done': Event, 'path': str or None, 'closed_at': float}
+_folder_dialog = None
+# Seconds a closed dialog's result waits for the polling client to collect it
+DIALOG_RESULT_GRACE = 10
 
 # Store last used download path for ZIP functionality
 last_download_path = None
 
+# Default-folder downloads go to per-job subfolders, removed once unused for JOB_TTL
+JOB_TTL = 3600  # 1 hour
+JOB_SWEEP_INTERVAL = 300  # 5 minutes
+_JOB_ID_RE = re.compile(r'^[0-9a-f]{8}$')
+_last_job_sweep = 0.0
+_job_sweep_lock = threading.Lock()
+
+# Worker pools shared by all requests, so total concurrency stays bounded
+# no matter how many requests the browser fires at once
+_fetch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='fetch')
+_download_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='download')
+
+# Downloaded file types included in the ZIP archive
+MEDIA_EXTENSIONS = ('.mp3', '.m4a', '.mp4')
+ZIP_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class _ZipStream:
+    """Write-only file object that buffers ZIP output until drained"""
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _job_dir(job_id):
+    """Folder holding the files of a default-folder download job"""
+    return DOWNLOADS_DIR / f"job_{job_id}"
+
+
+def _sweep_job_dirs(force=False):
+    """
+    Remove job folders that have not been used for JOB_TTL seconds
+    Runs at most once per JOB_SWEEP_INTERVAL unless force is set
+    """
+    global _last_job_sweep
+    now = time.time()
+    with _job_sweep_lock:
+        if not force and now - _last_job_sweep < JOB_SWEEP_INTERVAL:
+            return
+        _last_job_sweep = now
+    
+    for job_dir in DOWNLOADS_DIR.glob('job_*'):
+        try:
+            if job_dir.is_dir() and now - job_dir.stat().st_mtime > JOB_TTL:
+                shutil.rmtree(job_dir, ignore_errors=True)
+        except OSError:
+            pass
+
+
+def _resolve_download_dir(job_id=None):
+    """
+    Get the folder to serve files from
+    Uses the given job's folder, otherwise the last used download path
+    Returns None for malformed job ids
+    """
+    if job_id is not None:
+        if not _JOB_ID_RE.match(job_id):
+            return None
+        return _job_dir(job_id)
+    # Use last_download_path if set, otherwise default
+    return last_download_path if last_download_path else DOWNLOADS_DIR
+
 
 @app.route('/')
 def index():
@@ -30,42 +127,90 @@ def index():
     return render_template('index.html')
 
 
+def _run_tk():
+    """Create the hidden Tk root and run its event loop on this thread"""
+    global _tk_root
+    try:
+        import tkinter as tk
+        
+        root = tk.Tk()
+        root.withdraw()  # Hide the main window
+        root.attributes('-topmost', True)  # Bring dialogs to front
+        _tk_root = root
+    except Exception as e:
+        print(f"Dialog error: {e}")
+        return
+    finally:
+        _tk_ready.set()
+    
+    root.mainloop()
+
+
+def _open_dialog(dialog):
+    """Show the folder dialog (runs on the Tk thread) and publish the result"""
+    try:
+        from tkinter import filedialog
+        
+        folder_path = filedialog.askdirectory(
+            parent=_tk_root,
+            title='選擇下載資料夾',
+            mustexist=False
+        )
+        dialog['path'] = folder_path if folder_path else None
+    except Exception as e:
+        print(f"Dialog error: {e}")
+    finally:
+        dialog['closed_at'] = time.monotonic()
+        dialog['done'].set()
+
+
+def request_folder(timeout=30):
+    """
+    Show a folder selection dialog on the Tk thread, or keep waiting on the open one
+    Returns (done, path): done is False if the user is still choosing after timeout
+    """
+    global _folder_dialog
+    with _tk_lock:
+        if not _tk_ready.is_set():
+            threading.Thread(target=_run_tk, daemon=True).start()
+            _tk_ready.wait()
+        
+        if _tk_root is None:
+            return True, None
+        
+        # Drop a result the client stopped polling for (e.g. the tab was closed)
+        if (_folder_dialog is not None and _folder_dialog['done'].is_set()
+                and time.monotonic() - _folder_dialog['closed_at'] > DIALOG_RESULT_GRACE):
+            _folder_dialog = None
+        
+        if _folder_dialog is None:
+            _folder_dialog = {'done': threading.Event(), 'path': None, 'closed_at': None}
+            _tk_root.after(0, _open_dialog, _folder_dialog)
+        dialog = _folder_dialog
+    
+    if not dialog['done'].wait(timeout):
+        return False, None
+    
+    with _tk_lock:
+        if _folder_dialog is dialog:
+            _folder_dialog = None
+    return True, dialog['path']
+
+
 @app.route('/api/browse-folder', methods=['POST'])
 def browse_folder():
     """
     Open a folder selection dialog using tkinter
-    Returns the selected folder path
+    Returns the selected folder path, or 202 while the dialog is still open
     """
-    global selected_folder_path
-    
-    def open_dialog():
-        global selected_folder_path
-        try:
-            import tkinter as tk
-            from tkinter import filedialog
-            
-            root = tk.Tk()
-            root.withdraw()  # Hide the main window
-            root.attributes('-topmost', True)  # Bring dialog to front
-            
-            folder_path = filedialog.askdirectory(
-                title='選擇下載資料夾',
-                mustexist=False
-            )
-            
-            root.destroy()
-            selected_folder_path = folder_path if folder_path else None
-        except Exception as e:
-            print(f"Dialog error: {e}")
-            selected_folder_path = None
+    done, folder_path = request_folder()
     
-    # Run dialog in a separate thread to avoid blocking
-    dialog_thread = threading.Thread(target=open_dialog)
-    dialog_thread.start()
-    dialog_thread.join(timeout=60)  # Wait up to 60 seconds
+    if not done:
+        # Free the worker; the client polls this endpoint again
+        return jsonify({'status': 'pending'}), 202
     
-    if selected_folder_path:
-        return jsonify({'path': selected_folder_path})
+    if folder_path:
+        return jsonify({'path': folder_path})
     else:
         return jsonify({'path': None, 'error': 'No folder selected'})
 
@@ -83,45 +228,52 @@ def fetch_info():
     if not urls:
         return jsonify({'error': 'No URLs provided'}), 400
     
-    all_videos = []
+    urls = [url.strip() for url in urls if url.strip()]
+    try:
+        limit = int(limit) if limit else None
+    except (TypeError, ValueError):
+        limit = None
+    
+    results = {}
     errors = []
+    found = 0
     
-    for url in urls:
-        url = url.strip()
-        if not url:
+    # Extract all URLs in parallel (network-bound), keeping results per URL index
+    futures = {_fetch_executor.submit(extract_playlist_info, url, limit): i for i, url in enumerate(urls)}
+    for future in as_completed(futures):
+        if future.cancelled():
             continue
-        
+        url = urls[futures[future]]
         try:
-            videos = extract_playlist_info(url)
+            videos = future.result()
             if videos:
-                # Apply per-URL or total limit if needed (simplest is total limit at end, 
-                # but per-playlist limit during extraction would be faster if supported by backend.
-                # Here we just collect all and slice later for simplicity, same as GUI app initially did)
-                all_videos.extend(videos)
+                results[futures[future]] = videos
+                found += len(videos)
                 
-                # Optimization: Stop if we already exceed limit significantly
-                if limit and len(all_videos) > int(limit) + 50:
-                    break
+                # Optimization: Skip URLs not started yet if we already exceed limit significantly
+                if limit and found > limit + 50:
+                    for f in futures:
+                        f.cancel()
             else:
                 errors.append(f"Could not extract info from: {url}")
         except Exception as e:
             errors.append(f"Error processing {url}: {str(e)}")
     
+    # Keep videos in the order the URLs were given
+    all_videos = []
+    for i in sorted(results):
+        all_videos.extend(results[i])
+    
     # Apply strict limit
     if limit:
-        try:
-            limit_val = int(limit)
-            if len(all_videos) > limit_val:
-                all_videos = all_videos[:limit_val]
-        except:
-            pass
+        all_videos = all_videos[:limit]
     
     if not all_videos:
         return jsonify({'error': 'No videos found', 'details': errors}), 400
     
-    # Add formatted duration to each video
+    # Add normalized title (reused by check-duplicates) to each video
     for video in all_videos:
-        video['duration_formatted'] = format_duration(video.get('duration', 0))
+        video['_norm_title'] = title_key(video.get('title', ''))
     
     return jsonify({
         'videos': all_videos,
@@ -160,30 +312,33 @@ def download():
     videos = data.get('videos', [])
     custom_path = data.get('download_path', '').strip()
     output_format = data.get('format', 'mp3')  # Default to mp3
+    job_id = data.get('job_id')  # Optional job folder for default downloads
     
     if not videos:
         return jsonify({'error': 'No videos selected'}), 400
     
-    # Ensure ffmpeg is ready
-    try:
-        ensure_ffmpeg()
-    except Exception as e:
-        return jsonify({'error': f'FFmpeg setup failed: {str(e)}'}), 500
-    
     # Determine download directory
     global last_download_path
     if custom_path:
+        job_id = None
         download_dir = Path(custom_path)
         try:
             download_dir.mkdir(parents=True, exist_ok=True)
         except Exception as e:
             return jsonify({'error': f'無法建立資料夾: {str(e)}'}), 400
     else:
-        download_dir = DOWNLOADS_DIR
-        # Clean default downloads directory
-        if download_dir.exists():
-            shutil.rmtree(download_dir)
-        download_dir.mkdir(parents=True, exist_ok=True)
+        _sweep_job_dirs()
+        
+        # Reuse the client's job folder, or start a new one
+        if not _JOB_ID_RE.match(str(job_id or '')):
+            job_id = uuid.uuid4().hex[:8]
+        download_dir = _job_dir(job_id)
+        try:
+            download_dir.mkdir(parents=True, exist_ok=True)
+            # Mark the job as in use so the sweep doesn't expire it mid-batch
+            os.utime(download_dir)
+        except Exception as e:
+            return jsonify({'error': f'無法建立資料夾: {str(e)}'}), 400
     
     # Store for ZIP download
     last_download_path = download_dir
@@ -210,14 +365,12 @@ def download():
         except Exception as e:
             return {'title': title, 'success': False, 'error': str(e), 'video': video}
     
-    # Use ThreadPoolExecutor for parallel downloads (3 concurrent)
-    from concurrent.futures import ThreadPoolExecutor, as_completed
+    # Run on the shared download pool (8 concurrent across all requests)
     results = []
     
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        futures = {executor.submit(download_single, v): v for v in videos}
-        for future in as_completed(futures):
-            results.append(future.result())
+    futures = {_download_executor.submit(download_single, v): v for v in videos}
+    for future in as_completed(futures):
+        results.append(future.result())
     
     successful = [r for r in results if r.get('success')]
     
@@ -226,45 +379,61 @@ def download():
         'successful_count': len(successful),
         'total_count': len(videos),
         'download_path': str(download_dir),
+        'job_id': job_id,
         'format': output_format
     })
 
 
 @app.route('/api/download-zip', methods=['GET'])
-def download_zip():
+@app.route('/api/download-zip/<job_id>', methods=['GET'])
+def download_zip(job_id=None):
     """
-    Create and send a ZIP file containing all downloaded MP3s
+    Stream a ZIP file containing all downloaded songs
     """
-    # Use last download path or default
-    download_dir = last_download_path if last_download_path else DOWNLOADS_DIR
+    download_dir = _resolve_download_dir(job_id)
     
-    if not download_dir.exists():
+    if download_dir is None or not download_dir.exists():
         return jsonify({'error': 'No downloads available'}), 404
     
-    mp3_files = list(download_dir.glob('*.mp3'))
-    if not mp3_files:
-        return jsonify({'error': 'No MP3 files found'}), 404
-    
-    zip_path = download_dir / 'songs.zip'
+    media_files = sorted(
+        entry.path for entry in os.scandir(download_dir)
+        if entry.is_file() and entry.name.lower().endswith(MEDIA_EXTENSIONS)
+    )
+    if not media_files:
+        return jsonify({'error': 'No media files found'}), 404
     
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for mp3 in mp3_files:
-            zf.write(mp3, mp3.name)
+    def generate():
+        stream = _ZipStream()
+        # MP3/M4A/MP4 are already compressed, so store them as-is
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as zf:
+            for path in media_files:
+                zinfo = zipfile.ZipInfo.from_file(path, os.path.basename(path))
+                zinfo.compress_type = zipfile.ZIP_STORED
+                with open(path, 'rb') as src, zf.open(zinfo, 'w') as dest:
+                    for chunk in iter(lambda: src.read(ZIP_CHUNK_SIZE), b''):
+                        dest.write(chunk)
+                        yield stream.drain()
+                yield stream.drain()
+        yield stream.drain()
     
-    return send_file(
-        zip_path,
+    return Response(
+        stream_with_context(generate()),
         mimetype='application/zip',
-        as_attachment=True,
-        download_name='youtube_songs.zip'
+        headers={'Content-Disposition': 'attachment; filename=youtube_songs.zip'}
     )
 
 
 @app.route('/downloads/<path:filename>')
-def serve_download(filename):
+@app.route('/jobs/<job_id>/<path:filename>')
+def serve_download(filename, job_id=None):
     """Serve individual MP3 files"""
-    # Use last_download_path if set, otherwise default
-    directory = last_download_path if last_download_path else DOWNLOADS_DIR
-    return send_from_directory(directory, filename, as_attachment=True)
+    directory = _resolve_download_dir(job_id)
+    if directory is None:
+        return jsonify({'error': 'Unknown download job'}), 404
+    # conditional enables Range requests (resumable downloads) and ETag revalidation.
+    # Only job URLs are stable; /downloads/ follows last_download_path, so always revalidate it
+    max_age = 3600 if job_id is not None else 0
+    return send_from_directory(directory, filename, as_attachment=True, conditional=True, max_age=max_age)
 
 
 if __name__ == '__main__':
@@ -289,6 +458,9 @@ if __name__ == '__main__':
     print(f"Open http://localhost:5000 in your browser")
     print(f"Or on your phone (same Wi-Fi): http://{local_ip}:5000\n")
     
+    # Remove job folders left over from earlier runs
+    _sweep_job_dirs(force=True)
+    
     # Ensure ffmpeg is ready on startup
     try:
         ensure_ffmpeg()
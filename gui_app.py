@@ -3,25 +3,28 @@ YouTube to MP3/MP4 Converter - GUI Version
 Using CustomTkinter for modern UI
 """
 import os
+import re
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from pathlib import Path
 
-from utils.downloader import extract_playlist_info, download_media, format_duration, ensure_ffmpeg
-from utils.similarity import find_duplicates_smart
+from utils.downloader import extract_playlist_info, clear_playlist_cache, download_playlist, format_duration, ensure_ffmpeg
+from utils.similarity import find_duplicates_smart, song_key
 
 # App settings
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# Lines containing a YouTube link
+_YT_RE = re.compile(r'(?:youtube\.com|youtu\.be)')
+
 
 class VideoItem(ctk.CTkFrame):
     """A single video item with checkbox"""
     def __init__(self, master, video, index, is_duplicate=False, group_id=None, **kwargs):
         super().__init__(master, **kwargs)
-        self.video = video
-        self.index = index
         
         self.configure(fg_color="#2b2b2b", corner_radius=8)
         
@@ -41,34 +44,54 @@ class VideoItem(ctk.CTkFrame):
         info_frame = ctk.CTkFrame(self, fg_color="transparent")
         info_frame.pack(side="left", fill="x", expand=True, padx=5, pady=8)
         
-        title_text = video.get('title', 'Unknown')
         self.title_label = ctk.CTkLabel(
             info_frame, 
-            text=title_text[:60] + "..." if len(title_text) > 60 else title_text,
+            text="",
             font=ctk.CTkFont(size=13),
             anchor="w"
         )
         self.title_label.pack(anchor="w")
         
-        duration = video.get('duration_formatted', format_duration(video.get('duration', 0)))
         self.duration_label = ctk.CTkLabel(
             info_frame,
-            text=duration,
+            text="",
             font=ctk.CTkFont(size=11),
             text_color="gray"
         )
         self.duration_label.pack(anchor="w")
         
+        # Duplicate warning (packed only for duplicates)
+        self.warning_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=ctk.CTkFont(size=11),
+            text_color="#ffa502"
+        )
+        
+        self.set_video(video, index, is_duplicate, group_id)
+    
+    def set_video(self, video, index, is_duplicate=False, group_id=None):
+        """Show a video in this item, reusing the existing widgets"""
+        self.video = video
+        self.index = index
+        self.var.set(True)
+        
+        title_text = video.get('title', 'Unknown')
+        self.title_label.configure(
+            text=title_text[:60] + "..." if len(title_text) > 60 else title_text
+        )
+        
+        duration = video.get('duration_formatted') or format_duration(video.get('duration', 0))
+        self.duration_label.configure(text=duration)
+        
         # Duplicate warning
         if is_duplicate:
             self.configure(border_width=2, border_color="#ffa502")
-            warning_label = ctk.CTkLabel(
-                self,
-                text=f"⚠️ 群組 {group_id}",
-                font=ctk.CTkFont(size=11),
-                text_color="#ffa502"
-            )
-            warning_label.pack(side="right", padx=10)
+            self.warning_label.configure(text=f"⚠️ 群組 {group_id}")
+            self.warning_label.pack(side="right", padx=10)
+        else:
+            self.configure(border_width=0)
+            self.warning_label.pack_forget()
 
 
 class App(ctk.CTk):
@@ -83,6 +106,7 @@ class App(ctk.CTk):
         # State
         self.videos = []
         self.video_items = []
+        self._item_pool = []  # VideoItem widgets reused across analyses
         self.download_path = ""
         self.is_downloading = False
         self.is_analyzing = False
@@ -166,14 +190,26 @@ class App(ctk.CTk):
         self.url_textbox = ctk.CTkTextbox(url_frame, height=80)
         self.url_textbox.pack(fill="x", padx=15, pady=(0, 10))
         
+        btn_frame = ctk.CTkFrame(url_frame, fg_color="transparent")
+        btn_frame.pack(padx=15, pady=(0, 10))
+        
         self.analyze_btn = ctk.CTkButton(
-            url_frame,
+            btn_frame,
             text="🔍 分析 URL",
             font=ctk.CTkFont(size=14, weight="bold"),
             height=40,
             command=self.analyze_urls
         )
-        self.analyze_btn.pack(padx=15, pady=(0, 10))
+        self.analyze_btn.pack(side="left", padx=5)
+        
+        self.refresh_btn = ctk.CTkButton(
+            btn_frame,
+            text="🔄 重新整理",
+            width=100,
+            height=40,
+            command=self.refresh_urls
+        )
+        self.refresh_btn.pack(side="left", padx=5)
         
         # Video List
         list_frame = ctk.CTkFrame(main_frame)
@@ -240,14 +276,9 @@ class App(ctk.CTk):
             self.download_path = folder
     
     def parse_urls(self, text):
-        """Parse URLs from text"""
-        lines = text.strip().split('\n')
-        urls = []
-        for line in lines:
-            line = line.strip()
-            if line and ('youtube.com' in line or 'youtu.be' in line):
-                urls.append(line)
-        return urls
+        """Parse URLs from text, dropping repeated URLs"""
+        urls = (line for line in (ln.strip() for ln in text.splitlines()) if line and _YT_RE.search(line))
+        return list(dict.fromkeys(urls))
     
     def analyze_urls(self):
         """Analyze YouTube URLs"""
@@ -281,6 +312,7 @@ class App(ctk.CTk):
         
         # Show analyzing progress
         self.analyze_btn.configure(state="disabled", text="⏳ 分析中...")
+        self.refresh_btn.configure(state="disabled")
         self.progress_frame.pack(fill="x", pady=(15, 0))
         self.progress_label.configure(text="正在連接 YouTube，請稍候...")
         
@@ -291,6 +323,11 @@ class App(ctk.CTk):
         
         threading.Thread(target=self._analyze_urls_thread, args=(urls, limit), daemon=True).start()
     
+    def refresh_urls(self):
+        """Re-analyze URLs, bypassing cached playlist info"""
+        clear_playlist_cache()
+        self.analyze_urls()
+    
     def _animate_progress(self):
         """Animate progress bar manually"""
         if not self.is_analyzing:
@@ -306,33 +343,48 @@ class App(ctk.CTk):
     
     def _analyze_urls_thread(self, urls, limit=None):
         """Analyze URLs in background thread"""
+        results = {}
+        found = 0
+        done = 0
+        
+        # Extract all URLs in parallel (network-bound), keeping results per URL index
+        with ThreadPoolExecutor(max_workers=min(8, len(urls))) as executor:
+            futures = {executor.submit(extract_playlist_info, url, limit): i for i, url in enumerate(urls)}
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                done += 1
+                self.after(0, lambda d=done, n=len(urls): self.progress_label.configure(
+                    text=f"分析中 ({d}/{n})，請稍候..."
+                ))
+                try:
+                    videos = future.result()
+                    if videos:
+                        results[futures[future]] = videos
+                        found += len(videos)
+                        
+                        # Update status with count so far
+                        self.after(0, lambda c=found: self.progress_label.configure(
+                            text=f"已找到 {c} 首歌曲，載入中..."
+                        ))
+                        
+                        # Stop if limit reached: skip URLs not started yet
+                        if limit and found >= limit:
+                            for f in futures:
+                                f.cancel()
+                except Exception as e:
+                    print(f"Error: {e}")
+        
+        # Keep videos in the order the URLs were given, then apply limit
         all_videos = []
+        for i in sorted(results):
+            all_videos.extend(results[i])
+        if limit:
+            all_videos = all_videos[:limit]
         
-        for i, url in enumerate(urls):
-            self.after(0, lambda i=i, n=len(urls): self.progress_label.configure(
-                text=f"分析中 ({i+1}/{n})，請稍候..."
-            ))
-            try:
-                videos = extract_playlist_info(url)
-                if videos:
-                    # Apply limit if specified
-                    if limit and len(all_videos) + len(videos) > limit:
-                        remaining = limit - len(all_videos)
-                        videos = videos[:remaining]
-                    
-                    # Update status with count so far
-                    self.after(0, lambda c=len(videos): self.progress_label.configure(
-                        text=f"已找到 {len(all_videos) + c} 首歌曲，載入中..."
-                    ))
-                    for v in videos:
-                        v['duration_formatted'] = format_duration(v.get('duration', 0))
-                    all_videos.extend(videos)
-                    
-                    # Stop if limit reached
-                    if limit and len(all_videos) >= limit:
-                        break
-            except Exception as e:
-                print(f"Error: {e}")
+        # Normalize song names here, off the UI thread, so duplicate checks reuse them
+        for v in all_videos:
+            v['_norm_song'] = song_key(v.get('title', ''))
         
         # Processing duplicates
         self.after(0, lambda: self.progress_label.configure(text=f"處理 {len(all_videos)} 首歌曲..."))
@@ -349,40 +401,50 @@ class App(ctk.CTk):
         self.videos = videos
         self.video_items = []
         
-        # Clear existing items
-        for widget in self.video_scroll.winfo_children():
-            widget.destroy()
+        # Hide pooled items not needed for this list (always the tail, so order is kept)
+        for item in self._item_pool[len(videos):]:
+            item.pack_forget()
         
         if not videos:
             messagebox.showinfo("結果", "未找到任何影片")
             self.analyze_btn.configure(state="normal", text="🔍 分析 URL")
+            self.refresh_btn.configure(state="normal")
             return
         
         # Check duplicates with improved algorithm
         duplicate_groups, duplicate_indices = find_duplicates_smart(videos, threshold=85)
         
-        # Create video items
+        # Map each duplicate index to its 1-based group number
+        idx2grp = {}
+        for g_idx, group in enumerate(duplicate_groups):
+            for i in group:
+                idx2grp[i] = g_idx + 1
+        
+        # Fill video items, reusing pooled widgets and creating only the deficit
         for i, video in enumerate(videos):
-            is_dup = i in duplicate_indices
-            group_id = None
-            if is_dup:
-                for g_idx, group in enumerate(duplicate_groups):
-                    if i in group:
-                        group_id = g_idx + 1
-                        break
+            group_id = idx2grp.get(i)
+            is_dup = group_id is not None
             
-            item = VideoItem(
-                self.video_scroll,
-                video,
-                i,
-                is_duplicate=is_dup,
-                group_id=group_id
-            )
-            item.pack(fill="x", pady=2)
+            if i < len(self._item_pool):
+                item = self._item_pool[i]
+                item.set_video(video, i, is_duplicate=is_dup, group_id=group_id)
+            else:
+                item = VideoItem(
+                    self.video_scroll,
+                    video,
+                    i,
+                    is_duplicate=is_dup,
+                    group_id=group_id
+                )
+                self._item_pool.append(item)
+            
+            if not item.winfo_manager():
+                item.pack(fill="x", pady=2)
             self.video_items.append(item)
         
         self.count_label.configure(text=f"🎶 歌曲列表 ({len(videos)} 首)")
         self.analyze_btn.configure(state="normal", text="🔍 分析 URL")
+        self.refresh_btn.configure(state="normal")
         self.download_btn.configure(state="normal")
     
     def set_all_checkboxes(self, checked):
@@ -428,9 +490,6 @@ class App(ctk.CTk):
     
     def _download_thread(self, videos, download_path, output_format):
         """Download videos in background"""
-        import time
-        import random
-        
         total = len(videos)
         success = 0
         failed = 0
@@ -438,37 +497,28 @@ class App(ctk.CTk):
         # Create directory
         Path(download_path).mkdir(parents=True, exist_ok=True)
         
-        for i, video in enumerate(videos):
-            # Shorter delay between downloads (0.3-0.8s) for faster batch downloads
-            if i > 0:
-                time.sleep(random.uniform(0.3, 0.8))
-            
-            self.after(0, lambda i=i, t=total: self._update_progress(i, t, video.get('title', '')))
-            
-            try:
-                path = download_media(
-                    video.get('url', ''),
-                    video.get('id', ''),
-                    video.get('title', 'Unknown'),
-                    download_path,
-                    output_format
-                )
-                if path:
-                    success += 1
-                else:
-                    failed += 1
-            except Exception as e:
-                print(f"Download error: {e}")
+        # Parallel downloads (3 concurrent), reported as each one finishes
+        self.after(0, lambda: self._update_progress(0, total, ""))
+        results = download_playlist(videos, download_path, output_format, max_workers=3)
+        for i, (video, path) in enumerate(results, 1):
+            if path:
+                success += 1
+            else:
                 failed += 1
+            
+            title = video.get('title', '')
+            self.after(0, lambda i=i, t=total, title=title: self._update_progress(i, t, title))
         
         self.after(0, lambda: self._download_complete(success, failed, total))
     
-    def _update_progress(self, current, total, title):
-        """Update progress bar"""
-        progress = (current + 1) / total
-        self.progress_bar.set(progress)
+    def _update_progress(self, done, total, title):
+        """Update progress bar with the number of finished downloads and the latest title"""
+        self.progress_bar.set(done / total)
+        if not done:
+            self.progress_label.configure(text=f"下載中，已完成 0/{total}...")
+            return
         short_title = title[:40] + "..." if len(title) > 40 else title
-        self.progress_label.configure(text=f"下載中 ({current + 1}/{total}): {short_title}")
+        self.progress_label.configure(text=f"已完成 {done}/{total}: {short_title}")
     
     def _download_complete(self, success, failed, total):
         """Called when download is complete"""
@@ -7,6 +7,7 @@
 let videos = [];
 let duplicateIndices = new Set();
 let duplicateGroups = [];
+let currentJobId = null; // Server job folder for default-path downloads
 
 // DOM Elements
 const urlInput = document.getElementById('url-input');
@@ -56,10 +57,14 @@ async function handleBrowseFolder() {
     browseBtn.textContent = '選擇中...';
 
     try {
-        const response = await fetch('/api/browse-folder', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' }
-        });
+        // 202 means the dialog is still open: poll until the user is done
+        let response;
+        do {
+            response = await fetch('/api/browse-folder', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' }
+            });
+        } while (response.status === 202);
 
         const data = await response.json();
 
@@ -351,6 +356,9 @@ async function handleDownload() {
     const downloadPath = downloadPathInput.value.trim();
     const selectedFormat = document.querySelector('input[name="format"]:checked').value;
 
+    // Every batch to the default folder gets its own server-side job folder
+    currentJobId = downloadPath ? null : newJobId();
+
     // Get download mode
     const downloadMode = document.querySelector('input[name="download-mode"]:checked').value;
     let concurrent = 3; // Default balanced
@@ -384,6 +392,7 @@ async function handleDownload() {
                 body: JSON.stringify({
                     videos: [video],
                     download_path: downloadPath,
+                    job_id: currentJobId,
                     format: selectedFormat
                 })
             });
@@ -494,6 +503,7 @@ async function retryDownload(index) {
             body: JSON.stringify({
                 videos: [result.video],
                 download_path: downloadPath,
+                job_id: downloadPath ? null : currentJobId,
                 format: selectedFormat
             })
         });
@@ -520,7 +530,16 @@ async function retryDownload(index) {
  * Handle ZIP download
  */
 function handleDownloadZip() {
-    window.location.href = '/api/download-zip';
+    window.location.href = currentJobId ? `/api/download-zip/${currentJobId}` : '/api/download-zip';
+}
+
+/**
+ * Generate a random 8-hex-digit job id
+ */
+function newJobId() {
+    const bytes = new Uint8Array(4);
+    crypto.getRandomValues(bytes);
+    return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
 }
 
 /**
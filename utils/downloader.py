@@ -2,43 +2,201 @@
 YouTube/Playlist downloader utility using yt-dlp
 """
 import os
+import re
+import json
+import time
+import hashlib
+import itertools
+import tempfile
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import yt_dlp
 from pathlib import Path
 from .ffmpeg_setup import get_ffmpeg_path, download_ffmpeg
 
 DOWNLOADS_DIR = Path(__file__).parent.parent / "downloads"
 
+# Playlist info cache: "url#max_items" ("url#all" if unlimited) -> (timestamp, videos)
+PLAYLIST_CACHE_TTL = 600  # 10 minutes
+PLAYLIST_CACHE_SIZE = 128
+_playlist_cache = {}
+_playlist_cache_lock = threading.Lock()
+
+# On-disk playlist cache, shared across runs: sha1(cache key).json
+PLAYLIST_DISK_CACHE_TTL = 3600  # 1 hour
+_CACHE_DIR = DOWNLOADS_DIR.parent / ".cache"
+
+# Per-thread YoutubeDL instances reused by download_media (at most
+# YDL_CACHE_SIZE per thread, least recently used closed first)
+YDL_CACHE_SIZE = 4
+_ydl_local = threading.local()
+
+# Sentinel marking the end of a stream_and_download queue
+_DONE = object()
+
+# ffmpeg path, set once ensure_ffmpeg() succeeds
+_ffmpeg_path = None
+_ffmpeg_lock = threading.Lock()
+
+# get_ydl_opts results: ffmpeg path -> base options
+_ydl_opts_cache = {}
+
+# Extensions accepted when a download doesn't land at the expected path
+ALT_EXTENSIONS = ('.mp3', '.mp4', '.m4a', '.webm')
+
+# Characters kept in output filenames (Unicode word chars plus ' -_()')
+_SANITIZE = re.compile(r'[^\w \-()]')
+
 
 def ensure_ffmpeg():
-    """Ensure ffmpeg is available"""
-    ffmpeg_path = get_ffmpeg_path()
-    if not ffmpeg_path:
-        ffmpeg_path = download_ffmpeg()
-    return ffmpeg_path
+    """Ensure ffmpeg is available (checked once per process)"""
+    global _ffmpeg_path
+    if _ffmpeg_path:
+        return _ffmpeg_path
+    
+    # Lock so parallel downloads don't all fetch ffmpeg on first use
+    with _ffmpeg_lock:
+        if not _ffmpeg_path:
+            ffmpeg_path = get_ffmpeg_path()
+            if not ffmpeg_path:
+                ffmpeg_path = download_ffmpeg()
+            _ffmpeg_path = ffmpeg_path
+    return _ffmpeg_path
 
 
 def get_ydl_opts(ffmpeg_path=None):
-    """Get yt-dlp options"""
-    opts = {
-        'quiet': True,
-        'no_warnings': True,
-        'extract_flat': False,
-    }
-    if ffmpeg_path:
-        opts['ffmpeg_location'] = str(Path(ffmpeg_path).parent)
-    return opts
+    """Get yt-dlp options (built once per ffmpeg path)"""
+    opts = _ydl_opts_cache.get(ffmpeg_path)
+    if opts is None:
+        opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': False,
+        }
+        if ffmpeg_path:
+            opts['ffmpeg_location'] = str(Path(ffmpeg_path).parent)
+        _ydl_opts_cache[ffmpeg_path] = opts
+    # YoutubeDL keeps and mutates the params dict it is given, so hand out a copy
+    return dict(opts)
 
 
-def extract_playlist_info(url):
+def clear_playlist_cache():
+    """Forget cached playlist info so the next analysis refetches it"""
+    with _playlist_cache_lock:
+        _playlist_cache.clear()
+    for path in _CACHE_DIR.glob("*.json"):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _disk_cache_path(key):
+    """Path of the on-disk cache file for a playlist cache key"""
+    return _CACHE_DIR / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+
+def _read_disk_cache(key):
+    """Return (mtime, videos) for key if the cache file is fresh, else (None, None)"""
+    path = _disk_cache_path(key)
+    try:
+        mtime = path.stat().st_mtime
+        if time.time() - mtime < PLAYLIST_DISK_CACHE_TTL:
+            return mtime, json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        pass
+    return None, None
+
+
+def _write_disk_cache(key, videos):
+    """Atomically write videos to the on-disk cache"""
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=_CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(videos, f, ensure_ascii=False)
+            os.replace(tmp_path, _disk_cache_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        print(f"Error writing playlist cache: {e}")
+
+
+def extract_playlist_info(url, max_items=None, force_refresh=False):
     """
     Extract info from a playlist or single video URL
-    Returns list of video info dicts with: id, title, url, duration
+    Returns list of video info dicts with: id, title, url, duration, duration_formatted
+    Lists at most max_items videos, or the whole playlist if not given
+    Results are cached per URL in memory for PLAYLIST_CACHE_TTL seconds and
+    on disk for PLAYLIST_DISK_CACHE_TTL seconds; force_refresh skips both
+    """
+    key = f"{url}#{max_items or 'all'}"
+    now = time.time()
+    cached = None
+    if not force_refresh:
+        with _playlist_cache_lock:
+            cached = _playlist_cache.get(key)
+    
+    if cached and now - cached[0] < PLAYLIST_CACHE_TTL:
+        videos = cached[1]
+    else:
+        fetched_at, videos = (None, None) if force_refresh else _read_disk_cache(key)
+        complete = True
+        if not videos:
+            fetched_at = now
+            videos, complete = _extract_playlist_info(url, max_items)
+            # Don't cache failures or partial lists, so a retry actually refetches
+            if videos and complete:
+                _write_disk_cache(key, videos)
+        if videos and complete:
+            with _playlist_cache_lock:
+                _playlist_cache.pop(key, None)
+                if len(_playlist_cache) >= PLAYLIST_CACHE_SIZE:
+                    # Evict the oldest entry
+                    _playlist_cache.pop(next(iter(_playlist_cache)))
+                # Age disk hits from the file's mtime, so they don't outlive its TTL
+                _playlist_cache[key] = (fetched_at, videos)
+    
+    # Callers annotate the dicts, so hand out copies
+    return [dict(v) for v in videos]
+
+
+def _extract_playlist_info(url, max_items):
+    """
+    Extract playlist or video info from YouTube (uncached)
+    Returns (videos, complete); complete is False if extraction failed part way
+    """
+    videos = []
+    try:
+        for video in iter_playlist_info(url, max_items=max_items, raise_errors=True):
+            videos.append(video)
+    except Exception:
+        return videos, False
+    return videos, True
+
+
+def iter_playlist_info(url, max_items=None, raise_errors=False):
+    """
+    Stream info for a playlist or single video URL
+    Yields video info dicts with: id, title, url, duration, duration_formatted
+    as yt-dlp walks the playlist pages, so callers can start on early items
+    before later pages are fetched
+    
+    Args:
+        url: YouTube playlist or video URL
+        max_items: Optional maximum number of videos to yield
+        raise_errors: Re-raise extraction errors (after printing them) instead
+            of just ending the stream, so callers can tell a partial list apart
     """
     # Highly optimized extraction options for speed
     opts = {
         'quiet': True,
         'no_warnings': True,
-        'extract_flat': 'in_playlist',  # Only flatten playlists, get full info for single videos
+        'extract_flat': True,  # Never resolve playlist entries individually
         'skip_download': True,
         'ignoreerrors': True,  # Skip unavailable videos
         'socket_timeout': 5,   # Faster timeout
@@ -46,46 +204,71 @@ def extract_playlist_info(url):
         'no_check_certificates': True,  # Skip SSL verification for speed
         'geo_bypass': True,    # Bypass geo restrictions
         'nocheckcertificate': True,
-        'lazy_playlist': True,  # Don't fetch all entries at once
-        'playlist_items': '1-200',  # Limit to first 200 for speed
     }
     
     try:
         with yt_dlp.YoutubeDL(opts) as ydl:
-            info = ydl.extract_info(url, download=False)
+            # process=False leaves playlist entries as yt-dlp's lazy page generator
+            info = ydl.extract_info(url, download=False, process=False)
+            
+            # Follow redirects to the actual playlist/video
+            while info and info.get('_type') in ('url', 'url_transparent'):
+                info = ydl.extract_info(info['url'], download=False, ie_key=info.get('ie_key'), process=False)
             
             if info is None:
-                return []
+                return
             
             # Check if it's a playlist
             if 'entries' in info:
-                videos = []
-                entries = info.get('entries', [])
+                entries = info.get('entries') or []
+                if isinstance(entries, yt_dlp.utils.PagedList):
+                    if max_items:
+                        # Fetch only the pages covering the first max_items entries
+                        entries = entries.getslice(0, max_items)
+                    else:
+                        entries = _iter_pages(entries)
                 
-                # Process entries (may be generator for large playlists)
+                count = 0
                 for entry in entries:
-                    if entry:
-                        vid_id = entry.get('id', '')
-                        videos.append({
-                            'id': vid_id,
-                            'title': entry.get('title', 'Unknown'),
-                            'url': entry.get('url') or f"https://www.youtube.com/watch?v={vid_id}",
-                            'duration': entry.get('duration', 0),
-                            'thumbnail': entry.get('thumbnail', '')
-                        })
-                return videos
+                    if not entry:
+                        continue
+                    vid_id = entry.get('id', '')
+                    yield {
+                        'id': vid_id,
+                        'title': entry.get('title', 'Unknown'),
+                        'url': f"https://www.youtube.com/watch?v={vid_id}",
+                        'duration': entry.get('duration', 0),
+                        'duration_formatted': format_duration(entry.get('duration', 0)),
+                        'thumbnail': entry.get('thumbnail', '')
+                    }
+                    count += 1
+                    if max_items and count >= max_items:
+                        break
             else:
-                # Single video
-                return [{
-                    'id': info.get('id', ''),
-                    'title': info.get('title', 'Unknown'),
-                    'url': url,
-                    'duration': info.get('duration', 0),
-                    'thumbnail': info.get('thumbnail', '')
-                }]
+                # Single video: resolve it fully
+                info = ydl.process_ie_result(info, download=False)
+                if info:
+                    yield {
+                        'id': info.get('id', ''),
+                        'title': info.get('title', 'Unknown'),
+                        'url': url,
+                        'duration': info.get('duration', 0),
+                        'duration_formatted': format_duration(info.get('duration', 0)),
+                        'thumbnail': info.get('thumbnail', '')
+                    }
     except Exception as e:
         print(f"Error extracting info: {e}")
-        return []
+        if raise_errors:
+            raise
+
+
+def _iter_pages(paged):
+    """Yield a PagedList's entries one page at a time, fetching pages on demand"""
+    for pagenum in itertools.count():
+        page = paged.getpage(pagenum)
+        if not page:
+            return
+        yield from page
 
 
 def get_video_info(url):
@@ -102,6 +285,7 @@ def get_video_info(url):
                     'title': info.get('title', 'Unknown'),
                     'url': url,
                     'duration': info.get('duration', 0),
+                    'duration_formatted': format_duration(info.get('duration', 0)),
                     'thumbnail': info.get('thumbnail', '')
                 }
     except Exception as e:
@@ -119,60 +303,67 @@ def download_as_mp3(url, video_id, title, output_dir=None):
         output_dir: Optional custom output directory (Path object or string)
     Returns the path to the downloaded file or None on failure
     """
-    ffmpeg_path = ensure_ffmpeg()
-    if not ffmpeg_path:
-        return None
-    
-    # Use provided output_dir or default
-    if output_dir is None:
-        output_dir = DOWNLOADS_DIR
-    else:
-        output_dir = Path(output_dir)
-    
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Sanitize filename
-    safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-    if not safe_title:
-        safe_title = video_id
-    
-    output_path = output_dir / f"{safe_title}.mp3"
-    
-    opts = {
-        'format': 'bestaudio/best',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
-        'ffmpeg_location': str(Path(ffmpeg_path).parent),
-        'outtmpl': str(output_dir / f"{safe_title}.%(ext)s"),
-        'quiet': True,
-        'no_warnings': True,
-    }
+    return download_media(url, video_id, title, output_dir, 'mp3')
+
+
+def _get_ydl(key, opts):
+    """
+    Get this thread's YoutubeDL for an option set, creating it on first use
+    Reusing it across downloads skips extractor setup and keeps HTTP
+    connections alive; instances are per thread since YoutubeDL isn't
+    thread-safe, and callers set the output template per download
+    """
+    cache = getattr(_ydl_local, 'instances', None)
+    if cache is None:
+        cache = _ydl_local.instances = {}
     
+    ydl = cache.pop(key, None)
+    if ydl is None:
+        if len(cache) >= YDL_CACHE_SIZE:
+            # Close the least recently used instance
+            _close_ydl(cache.pop(next(iter(cache))))
+        ydl = yt_dlp.YoutubeDL(opts)
+    # Reinsert so the dict stays in least-recently-used order
+    cache[key] = ydl
+    return ydl
+
+
+def _close_ydl(ydl):
+    """Close a cached YoutubeDL, releasing its HTTP connections"""
     try:
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            ydl.download([url])
-        
-        if output_path.exists():
-            return str(output_path)
+        ydl.close()
     except Exception as e:
-        print(f"Error downloading {title}: {e}")
-    
-    return None
+        print(f"Error closing YoutubeDL: {e}")
+
+
+def _init_ydl_cache(caches):
+    """Executor initializer: give the worker thread its own YoutubeDL cache, recorded in caches"""
+    _ydl_local.instances = {}
+    caches.append(_ydl_local.instances)
+
+
+def _close_ydl_caches(caches):
+    """Close the YoutubeDL instances cached by finished worker threads"""
+    for cache in caches:
+        for ydl in cache.values():
+            _close_ydl(ydl)
+        cache.clear()
+
+
+def safe_filename(title, fallback):
+    """Strip characters that are unsafe in filenames, using fallback if nothing is left"""
+    return _SANITIZE.sub('', title).strip() or fallback
 
 
 def format_duration(seconds):
     """Format duration in seconds to MM:SS"""
     if not seconds:
         return "Unknown"
-    minutes = int(seconds) // 60
-    secs = int(seconds) % 60
+    minutes, secs = divmod(int(seconds), 60)
     return f"{minutes}:{secs:02d}"
 
 
-def download_media(url, video_id, title, output_dir=None, format_type='mp3'):
+def download_media(url, video_id, title, output_dir=None, format_type='mp3', concurrent_fragments=None):
     """
     Download a video in specified format
     
@@ -182,6 +373,7 @@ def download_media(url, video_id, title, output_dir=None, format_type='mp3'):
         title: Video title
         output_dir: Output directory (Path or string)
         format_type: 'mp3', 'mp4', 'mp4_1080', or 'm4a'
+        concurrent_fragments: Fragments to fetch in parallel (default depends on format)
     
     Returns the path to the downloaded file or None on failure
     """
@@ -198,9 +390,7 @@ def download_media(url, video_id, title, output_dir=None, format_type='mp3'):
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # Sanitize filename
-    safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_', '(', ')')).strip()
-    if not safe_title:
-        safe_title = video_id
+    safe_title = safe_filename(title, video_id)
     
     # Configure based on format
     if format_type == 'mp3':
@@ -212,18 +402,26 @@ def download_media(url, video_id, title, output_dir=None, format_type='mp3'):
                 'preferredcodec': 'mp3',
                 'preferredquality': '192',
             }],
+            # Audio streams are a single file, so fragment concurrency doesn't help
+            'concurrent_fragment_downloads': 1,
+            'http_chunk_size': 1048576,  # 1MB chunks
         }
     elif format_type == 'mp4':
         extension = 'mp4'
         opts = {
             'format': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best',
             'merge_output_format': 'mp4',
+            'concurrent_fragment_downloads': 4,
+            'http_chunk_size': 10485760,  # 10MB chunks
         }
     elif format_type == 'mp4_1080':
         extension = 'mp4'
         opts = {
             'format': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best',
             'merge_output_format': 'mp4',
+            # DASH streams with many segments benefit most from parallel fragments
+            'concurrent_fragment_downloads': 8,
+            'http_chunk_size': 10485760,  # 10MB chunks
         }
     elif format_type == 'm4a':
         extension = 'm4a'
@@ -234,6 +432,8 @@ def download_media(url, video_id, title, output_dir=None, format_type='mp3'):
                 'preferredcodec': 'm4a',
                 'preferredquality': '256',
             }],
+            'concurrent_fragment_downloads': 1,
+            'http_chunk_size': 1048576,  # 1MB chunks
         }
     else:
         # Default to mp3
@@ -245,22 +445,30 @@ def download_media(url, video_id, title, output_dir=None, format_type='mp3'):
                 'preferredcodec': 'mp3',
                 'preferredquality': '192',
             }],
+            # Audio streams are a single file, so fragment concurrency doesn't help
+            'concurrent_fragment_downloads': 1,
+            'http_chunk_size': 1048576,  # 1MB chunks
         }
     
+    if concurrent_fragments:
+        opts['concurrent_fragment_downloads'] = concurrent_fragments
+    
     output_path = output_dir / f"{safe_title}.{extension}"
     
+    # Skip files already downloaded by an earlier run
+    if output_path.exists() and output_path.stat().st_size > 0:
+        print(f"Already downloaded: {output_path}")
+        return str(output_path)
+    
     # Use android player client to bypass 403 errors (no cookies/admin needed)
     # Maximum speed optimizations
     opts.update({
         'ffmpeg_location': str(Path(ffmpeg_path).parent),
-        'outtmpl': str(output_dir / f"{safe_title}.%(ext)s"),
         'quiet': True,
         'no_warnings': True,
         'extractor_args': {'youtube': {'player_client': ['android']}},
         # Speed optimizations - aggressive
-        'concurrent_fragment_downloads': 8,  # Download 8 fragments at once (max)
         'buffersize': 1024 * 64,  # 64KB buffer
-        'http_chunk_size': 10485760,  # 10MB chunks
         'retries': 1,  # Minimal retries for speed
         'fragment_retries': 1,
         'socket_timeout': 8,  # Shorter timeout
@@ -286,19 +494,25 @@ def download_media(url, video_id, title, output_dir=None, format_type='mp3'):
             current_opts = opts.copy()
             current_opts.update(extra_opts)
             
-            with yt_dlp.YoutubeDL(current_opts) as ydl:
-                ydl.download([url])
+            ydl = _get_ydl(
+                (format_type, strategy_name, current_opts['concurrent_fragment_downloads']),
+                current_opts
+            )
+            ydl.params['outtmpl']['default'] = str(output_dir / f"{safe_title}.%(ext)s")
+            info = ydl.extract_info(url, download=True)
             
-            # Check if file exists
-            if output_path.exists():
-                print(f"Downloaded: {output_path}")
-                return str(output_path)
+            # yt-dlp records the final (post-processed) path of each download
+            downloads = (info or {}).get('requested_downloads') or []
+            filepath = downloads[0].get('filepath') if downloads else None
+            if filepath and os.path.exists(filepath):
+                print(f"Downloaded: {filepath}")
+                return filepath
             
-            # Check for alternative extensions
-            for f in output_dir.glob(f"{safe_title}.*"):
-                if f.suffix.lower() in ['.mp3', '.mp4', '.m4a', '.webm']:
-                    print(f"Downloaded: {f}")
-                    return str(f)
+            # Check if file exists, then alternative extensions
+            for candidate in [output_path] + [output_dir / f"{safe_title}{ext}" for ext in ALT_EXTENSIONS]:
+                if candidate.exists():
+                    print(f"Downloaded: {candidate}")
+                    return str(candidate)
                     
         except Exception as e:
             error_msg = str(e)
@@ -313,3 +527,118 @@ def download_media(url, video_id, title, output_dir=None, format_type='mp3'):
     print(f"All download strategies failed for: {title}")
     return None
 
+
+def _download_video(video, output_dir, format_type):
+    """Download one video dict, returning the file path or None on failure"""
+    try:
+        return download_media(
+            video.get('url', ''),
+            video.get('id', ''),
+            video.get('title', 'Unknown'),
+            output_dir,
+            format_type
+        )
+    except Exception as e:
+        print(f"Download error: {e}")
+        return None
+
+
+def download_playlist(videos, output_dir=None, format_type='mp3', max_workers=4):
+    """
+    Download several videos in parallel
+    
+    Args:
+        videos: List of video dicts with 'url', 'id', 'title'
+        output_dir: Output directory (Path or string)
+        format_type: 'mp3', 'mp4', 'mp4_1080', or 'm4a'
+        max_workers: Number of concurrent downloads
+    
+    Yields (video, path) tuples as downloads finish; path is None on failure
+    """
+    # Resolve ffmpeg once up front instead of in every worker
+    try:
+        ensure_ffmpeg()
+    except Exception as e:
+        # Without ffmpeg nothing can be converted: report every video as failed
+        print(f"Error setting up FFmpeg: {e}")
+        for video in videos:
+            yield video, None
+        return
+    
+    # Workers' YoutubeDL instances, closed once the batch is done
+    caches = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, initializer=_init_ydl_cache, initargs=(caches,)) as executor:
+            futures = {executor.submit(_download_video, v, output_dir, format_type): v for v in videos}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    finally:
+        _close_ydl_caches(caches)
+
+
+def stream_and_download(url, output_dir=None, format_type='mp3', max_workers=4):
+    """
+    Download a playlist while it is still being extracted
+    A producer thread streams entries from iter_playlist_info into a bounded
+    queue that download workers drain, so downloads of the first items
+    overlap with fetching later playlist pages
+    
+    Args:
+        url: YouTube playlist or video URL
+        output_dir: Output directory (Path or string)
+        format_type: 'mp3', 'mp4', 'mp4_1080', or 'm4a'
+        max_workers: Number of concurrent downloads
+    
+    Yields (video, path) tuples as downloads finish; path is None on failure
+    """
+    # Resolve ffmpeg once up front instead of in every worker
+    ensure_ffmpeg()
+    
+    pending = queue.Queue(maxsize=max_workers * 4)
+    results = queue.Queue()
+    stop = threading.Event()
+    
+    def produce():
+        try:
+            for video in iter_playlist_info(url):
+                if stop.is_set():
+                    break
+                pending.put(video)
+        finally:
+            # One sentinel per worker so each of them exits
+            for _ in range(max_workers):
+                pending.put(_DONE)
+    
+    def consume():
+        try:
+            while True:
+                video = pending.get()
+                if video is _DONE:
+                    break
+                # After the caller stops, keep draining so the producer never blocks
+                if not stop.is_set():
+                    results.put((video, _download_video(video, output_dir, format_type)))
+        finally:
+            results.put(_DONE)
+    
+    threading.Thread(target=produce, daemon=True).start()
+    
+    # Workers' YoutubeDL instances, closed once the batch is done
+    caches = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, initializer=_init_ydl_cache, initargs=(caches,)) as executor:
+            for _ in range(max_workers):
+                executor.submit(consume)
+            
+            try:
+                finished = 0
+                while finished < max_workers:
+                    item = results.get()
+                    if item is _DONE:
+                        finished += 1
+                    else:
+                        yield item
+            finally:
+                stop.set()
+    finally:
+        _close_ydl_caches(caches)
@@ -4,25 +4,46 @@ Automatically downloads and extracts ffmpeg for Windows
 """
 import os
 import sys
+import shutil
 import zipfile
 import requests
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 FFMPEG_URL = "https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl.zip"
 FFMPEG_DIR = Path(__file__).parent.parent / "ffmpeg"
+FFMPEG_EXE = FFMPEG_DIR / "bin" / "ffmpeg.exe"
+
+# Archive members to install; yt-dlp needs ffprobe alongside ffmpeg
+NEEDED_BINARIES = ('/bin/ffmpeg.exe', '/bin/ffprobe.exe')
+CHUNK_SIZE = 1 << 20  # 1MB
+
+# Shared session: pooled connections and retries on transient server errors
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+))
+
+# Cached ffmpeg path, set once the executable is found
+_ffmpeg_exe = None
 
 
 def get_ffmpeg_path():
     """Get the path to ffmpeg executable"""
-    ffmpeg_exe = FFMPEG_DIR / "bin" / "ffmpeg.exe"
-    if ffmpeg_exe.exists():
-        return str(ffmpeg_exe)
-    return None
+    global _ffmpeg_exe
+    # Once found the path never changes, so skip the stat after that;
+    # a miss is not cached because download_ffmpeg() may install it later
+    if _ffmpeg_exe is None and FFMPEG_EXE.exists():
+        _ffmpeg_exe = str(FFMPEG_EXE)
+    return _ffmpeg_exe
 
 
 def download_ffmpeg():
     """Download and extract ffmpeg if not present"""
-    ffmpeg_exe = FFMPEG_DIR / "bin" / "ffmpeg.exe"
+    ffmpeg_exe = FFMPEG_EXE
     
     if ffmpeg_exe.exists():
         print("✓ FFmpeg already installed")
@@ -34,35 +55,39 @@ def download_ffmpeg():
     zip_path = FFMPEG_DIR / "ffmpeg.zip"
     
     # Download with progress
-    response = requests.get(FFMPEG_URL, stream=True)
-    total_size = int(response.headers.get('content-length', 0))
-    
-    with open(zip_path, 'wb') as f:
-        downloaded = 0
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
-            downloaded += len(chunk)
-            if total_size:
-                percent = (downloaded / total_size) * 100
-                print(f"\rDownloading: {percent:.1f}%", end="", flush=True)
+    with _SESSION.get(FFMPEG_URL, stream=True, timeout=(5, 30)) as response:
+        response.raise_for_status()
+        total_size = int(response.headers.get('content-length', 0))
+        
+        with open(zip_path, 'wb') as f:
+            downloaded = 0
+            last_percent = -1
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                downloaded += len(chunk)
+                if total_size:
+                    # Only print when the whole percentage changes
+                    percent = downloaded * 100 // total_size
+                    if percent != last_percent:
+                        last_percent = percent
+                        print(f"\rDownloading: {percent}%", end="", flush=True)
     
     print("\nExtracting FFmpeg...")
     
-    # Extract
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(FFMPEG_DIR)
+    # Extract only the executables we need, straight into ffmpeg/bin
+    target_bin = FFMPEG_DIR / "bin"
+    target_bin.mkdir(exist_ok=True)
     
-    # Move files from nested folder to ffmpeg/bin
-    extracted_folders = [d for d in FFMPEG_DIR.iterdir() if d.is_dir() and d.name.startswith("ffmpeg")]
-    if extracted_folders:
-        extracted_bin = extracted_folders[0] / "bin"
-        target_bin = FFMPEG_DIR / "bin"
-        target_bin.mkdir(exist_ok=True)
-        
-        for file in extracted_bin.iterdir():
-            target = target_bin / file.name
-            if not target.exists():
-                file.rename(target)
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            if not info.filename.endswith(NEEDED_BINARIES):
+                continue
+            target = target_bin / Path(info.filename).name
+            partial = target.with_suffix('.part')
+            with zip_ref.open(info) as src, open(partial, 'wb') as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            # Rename only when complete, so a partial ffmpeg.exe is never picked up
+            os.replace(partial, target)
     
     # Cleanup
     zip_path.unlink()
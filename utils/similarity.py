@@ -3,7 +3,12 @@ Song title similarity detection
 Uses fuzzy matching to find potential duplicate songs
 """
 import re
-from fuzzywuzzy import fuzz
+import math
+from collections import defaultdict
+from functools import lru_cache
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
 
 
 # Common patterns to remove from titles (expanded for Chinese music)
@@ -67,6 +72,47 @@ NOISE_PATTERNS = [
     r'演唱会',
 ]
 
+# Patterns that consume the rest of the title (or the rest of its words);
+# they keep their own pass so they only see what earlier patterns left
+_GREEDY_PATTERNS = {
+    r'\|.*$',
+    r'feat\.?\s*[\w\s]+',
+    r'ft\.?\s*[\w\s]+',
+    r'prod\.?\s*[\w\s]+',
+}
+
+
+def _build_noise_passes(patterns):
+    """
+    Compile NOISE_PATTERNS into as few regexes as possible, keeping list order
+    Consecutive ordinary patterns are fused into one alternation (one scan
+    per title instead of one per pattern); greedy patterns stay separate
+    """
+    passes = []
+    run = []
+    for pattern in patterns:
+        if pattern in _GREEDY_PATTERNS:
+            if run:
+                passes.append('|'.join(f'(?:{p})' for p in run))
+                run = []
+            passes.append(pattern)
+        else:
+            run.append(pattern)
+    if run:
+        passes.append('|'.join(f'(?:{p})' for p in run))
+    return [re.compile(p, re.IGNORECASE) for p in passes]
+
+
+_NOISE_PASSES = _build_noise_passes(NOISE_PATTERNS)
+_WS = re.compile(r'\s+')
+_EDGE = re.compile(r'^[\s\-\|:]+|[\s\-\|:]+$')
+
+# Song name inside Chinese brackets, and artist/song separators in priority order
+_BRACKET_RE = re.compile(r'[《「【](.+?)[》」】]')
+_SONG_SEPARATORS = (' - ', ' | ', ' – ', '：', ': ')
+
+# Rows of the pairwise score matrix computed per cdist call
+CDIST_BLOCK_ROWS = 256
 
 
 def normalize_title(title):
@@ -80,69 +126,117 @@ def normalize_title(title):
     normalized = title.lower().strip()
     
     # Apply all noise patterns
-    for pattern in NOISE_PATTERNS:
-        normalized = re.sub(pattern, '', normalized, flags=re.IGNORECASE)
+    for pattern in _NOISE_PASSES:
+        normalized = pattern.sub('', normalized)
     
     # Remove extra whitespace
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    normalized = _WS.sub(' ', normalized).strip()
     
     # Remove leading/trailing punctuation
-    normalized = re.sub(r'^[\s\-\|:]+|[\s\-\|:]+$', '', normalized)
+    normalized = _EDGE.sub('', normalized)
     
     return normalized
 
 
+@lru_cache(maxsize=4096)
+def title_key(title):
+    """
+    Fully processed form of a title used for similarity scoring
+    Store it on the video dict as '_norm_title' to skip recomputing it
+    Memoized per title, so repeated titles and repeated runs are normalized once
+    """
+    return default_process(normalize_title(title))
+
+
 def calculate_similarity(title1, title2):
     """
     Calculate similarity between two titles
     Returns a score from 0-100
     """
-    norm1 = normalize_title(title1)
-    norm2 = normalize_title(title2)
+    norm1 = title_key(title1)
+    norm2 = title_key(title2)
     
     if not norm1 or not norm2:
         return 0
     
     # Use token set ratio for better matching with word order differences
-    return fuzz.token_set_ratio(norm1, norm2)
+    return round(fuzz.token_set_ratio(norm1, norm2))
 
 
-def find_duplicates(videos, threshold=80):
+def _similar_pairs(norms, threshold):
     """
-    Find groups of potentially duplicate songs
-    
-    Args:
-        videos: List of video dicts with 'id', 'title', etc.
-        threshold: Similarity threshold (0-100)
-    
-    Returns:
-        List of duplicate groups, each group is a list of video indices
-        Also returns a set of indices that are part of some duplicate group
+    Score every pair of distinct normalized titles, upper triangle only
+    Returns a list of (i, j) index pairs with similarity >= threshold
     """
-    n = len(videos)
-    duplicate_pairs = []
-    
-    # Compare all pairs
-    for i in range(n):
-        for j in range(i + 1, n):
-            similarity = calculate_similarity(videos[i]['title'], videos[j]['title'])
-            if similarity >= threshold:
-                duplicate_pairs.append((i, j, similarity))
+    # Bucket identical titles: they are duplicates without any fuzzy scoring
+    buckets = defaultdict(list)
+    for i, norm in enumerate(norms):
+        if norm:
+            buckets[norm].append(i)
+    
+    keys = list(buckets)
+    members = list(buckets.values())
+    
+    # Link every bucket member to the bucket's first index
+    pairs = [(group[0], j) for group in members for j in group[1:]]
+    
+    if len(keys) < 2:
+        return pairs
+    
+    # Scores are whole numbers 0-100, so an integer cutoff keeps the
+    # comparison in uint8 (a fractional threshold rounds up)
+    cutoff = np.uint8(min(max(math.ceil(float(threshold)), 0), 100))
+    
+    # Score only the upper triangle, a block of rows at a time: rows
+    # [start, end) against columns [start, n), computed in C++ across all cores
+    n = len(keys)
+    for start in range(0, n - 1, CDIST_BLOCK_ROWS):
+        end = min(start + CDIST_BLOCK_ROWS, n)
+        scores = process.cdist(
+            keys[start:end], keys[start:],
+            scorer=fuzz.token_set_ratio,
+            dtype=np.uint8,
+            workers=-1,
+            score_cutoff=int(cutoff)
+        )
+        
+        # Threshold the uint8 block in one vectorized pass; k=1 keeps columns
+        # right of the diagonal, so each pair once and no self-matches
+        for a, b in np.argwhere(np.triu(scores >= cutoff, k=1)).tolist():
+            pairs.append((members[start + a][0], members[start + b][0]))
     
-    # Build groups using union-find approach
+    return pairs
+
+
+def _group_pairs(n, pairs):
+    """
+    Build duplicate groups from similar pairs using union-find
+    Returns the same (duplicate_groups, duplicate_indices) tuple as find_duplicates
+    """
     parent = list(range(n))
+    rank = [0] * n
     
     def find(x):
-        if parent[x] != x:
-            parent[x] = find(parent[x])
-        return parent[x]
+        # Iterative: locate the root, then point the whole path at it
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
     
     def union(x, y):
         px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
-    
-    for i, j, _ in duplicate_pairs:
+        if px == py:
+            return
+        # Union by rank keeps the trees flat
+        if rank[px] > rank[py]:
+            px, py = py, px
+        parent[px] = py
+        if rank[px] == rank[py]:
+            rank[py] += 1
+    
+    for i, j in pairs:
         union(i, j)
     
     # Collect groups
@@ -164,6 +258,25 @@ def find_duplicates(videos, threshold=80):
     return duplicate_groups, duplicate_indices
 
 
+def find_duplicates(videos, threshold=80, key='_norm_title'):
+    """
+    Find groups of potentially duplicate songs
+    
+    Args:
+        videos: List of video dicts with 'id', 'title', etc.
+        threshold: Similarity threshold (0-100)
+        key: Video dict field holding a precomputed title_key()
+    
+    Returns:
+        List of duplicate groups, each group is a list of video indices
+        Also returns a set of indices that are part of some duplicate group
+    """
+    # Normalize each title once (or reuse the stored form) instead of once per pair
+    norms = [v.get(key) or title_key(v['title']) for v in videos]
+    
+    return _group_pairs(len(videos), _similar_pairs(norms, threshold))
+
+
 def extract_song_name(title):
     """
     Extract the actual song name from a title by removing artist names
@@ -176,86 +289,46 @@ def extract_song_name(title):
     if not title:
         return ""
     
-    # Try to extract from Chinese brackets first
-    match = re.search(r'[《「【](.+?)[》」】]', title)
-    if match:
-        return match.group(1).strip()
+    # Try to extract from Chinese brackets first (only if an opening bracket is present)
+    if any(c in title for c in '《「【'):
+        match = _BRACKET_RE.search(title)
+        if match:
+            return match.group(1).strip()
     
     # Try separator patterns
-    separators = [' - ', ' | ', ' – ', '：', ': ']
-    for sep in separators:
-        if sep in title:
-            parts = title.split(sep, 1)
-            if len(parts) == 2:
-                # Return the longer part (usually the song name)
-                return parts[1].strip()
+    for sep in _SONG_SEPARATORS:
+        pos = title.find(sep)
+        if pos != -1:
+            # Return the longer part (usually the song name)
+            return title[pos + len(sep):].strip()
     
     return title
 
 
-def find_duplicates_smart(videos, threshold=85):
+@lru_cache(maxsize=4096)
+def song_key(title):
+    """
+    Fully processed song name of a title used by find_duplicates_smart
+    Store it on the video dict as '_norm_song' to skip recomputing it
+    Memoized per title, so repeated titles and repeated runs are normalized once
+    """
+    return default_process(normalize_title(extract_song_name(title)))
+
+
+def find_duplicates_smart(videos, threshold=85, key='_norm_song'):
     """
     Improved duplicate detection that focuses on song names, not artist names
     
     Args:
         videos: List of video dicts with 'id', 'title', etc.
         threshold: Similarity threshold (0-100)
+        key: Video dict field holding a precomputed song_key()
     
     Returns:
         List of duplicate groups, each group is a list of video indices
         Also returns a set of indices that are part of some duplicate group
     """
-    n = len(videos)
-    duplicate_pairs = []
-    
-    # Compare all pairs using extracted song names
-    for i in range(n):
-        song1 = extract_song_name(videos[i]['title'])
-        norm1 = normalize_title(song1)
-        
-        for j in range(i + 1, n):
-            song2 = extract_song_name(videos[j]['title'])
-            norm2 = normalize_title(song2)
-            
-            if not norm1 or not norm2:
-                continue
-                
-            # Only mark as duplicate if song names are very similar
-            similarity = fuzz.token_set_ratio(norm1, norm2)
-            if similarity >= threshold:
-                duplicate_pairs.append((i, j, similarity))
-    
-    # Build groups using union-find approach
-    parent = list(range(n))
-    
-    def find(x):
-        if parent[x] != x:
-            parent[x] = find(parent[x])
-        return parent[x]
-    
-    def union(x, y):
-        px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
+    # Extract and normalize each song name once (or reuse the stored form) instead of once per pair
+    norms = [v.get(key) or song_key(v['title']) for v in videos]
     
-    for i, j, _ in duplicate_pairs:
-        union(i, j)
-    
-    # Collect groups
-    groups = {}
-    for i in range(n):
-        root = find(i)
-        if root not in groups:
-            groups[root] = []
-        groups[root].append(i)
-    
-    # Only return groups with more than 1 member
-    duplicate_groups = [indices for indices in groups.values() if len(indices) > 1]
-    
-    # Get set of all indices in duplicate groups
-    duplicate_indices = set()
-    for group in duplicate_groups:
-        duplicate_indices.update(group)
-    
-    return duplicate_groups, duplicate_indices
-
+    return _group_pairs(len(videos), _similar_pairs(norms, threshold))